@@ -9,8 +9,9 @@ This is intended as a practical smoke test for:
 Notes
 -----
 - This script uses the built-in model function ``isothermal_transmission``.
-- It sets ``OMP_NUM_THREADS=1`` by default to avoid thread oversubscription
-  when running multiple MPI ranks.
+- It sets ``OMP_NUM_THREADS=1`` (and the equivalent MKL/OpenBLAS/BLIS thread
+  variables) by default to avoid thread oversubscription when running
+  multiple MPI ranks.
 - Opacity files are not stored in this repository due to size constraints.
   Download and configure your own opacity files following:
   https://petitradtrans.readthedocs.io/en/latest/content/available_opacities.html
@@ -19,11 +20,437 @@ Notes
 from __future__ import annotations
 
 import argparse
+import atexit
+import hashlib
+import json
 import os
+import pickle
+import shutil
 import sys
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
 
 
+@dataclass(frozen=True)
+class PriorSpec:
+    """Declarative description of one retrieval parameter.
+
+    Attributes
+    ----------
+    name : str
+        Parameter name as understood by the pRT model function.
+    free : bool
+        Whether the parameter is sampled. Fixed parameters use ``lo`` (times
+        ``scale``) as their value.
+    lo, hi : float
+        Bounds of the uniform prior (or the fixed value, for ``free=False``).
+    scale : str
+        Optional name of a ``petitRADTRANS.physical_constants`` attribute to
+        multiply the bounds by (e.g. ``"r_jup_mean"``), so prior files can
+        stay in natural units.
+    """
+
+    name: str
+    free: bool
+    lo: float
+    hi: float
+    scale: str = ""
+
+
+# Priors matching the pRT basic-retrieval example; used when --prior-file is
+# not given. Keeping these as data (rather than inline add_parameter calls)
+# means a prior file can replace them without touching code.
+_DEFAULT_PRIOR_SPECS = [
+    PriorSpec("stellar_radius", False, 0.651, 0.651, scale="r_sun"),
+    PriorSpec("log_g", True, 2.0, 5.5),
+    PriorSpec("planet_radius", True, 0.2, 0.4, scale="r_jup_mean"),
+    PriorSpec("temperature", True, 300.0, 2300.0),
+    PriorSpec("log_Pcloud", True, -6.0, 2.0),
+]
+
+
+def _load_prior_specs(path: Path) -> list[PriorSpec]:
+    """Load parameter priors from a JSON or YAML file.
+
+    Parameters
+    ----------
+    path : Path
+        Prior file: a list of mappings with ``PriorSpec`` fields. ``.yml`` /
+        ``.yaml`` files are parsed with PyYAML; anything else is parsed as
+        JSON.
+
+    Returns
+    -------
+    list of PriorSpec
+        Parsed parameter specifications, in file order.
+
+    Raises
+    ------
+    ImportError
+        If a YAML file is given but PyYAML is not installed.
+    """
+    text = path.read_text()
+    if path.suffix in (".yml", ".yaml"):
+        try:
+            import yaml
+        except ImportError as exc:
+            raise ImportError(
+                "Reading YAML prior files requires PyYAML; install it or use JSON."
+            ) from exc
+        entries = yaml.safe_load(text)
+    else:
+        entries = json.loads(text)
+    return [PriorSpec(**entry) for entry in entries]
+
+
+class AffinePrior:
+    """Scalar prior transform mapping the unit cube to ``[lo, lo + span]``.
+
+    Parameters
+    ----------
+    lo : float
+        Lower bound of the prior interval.
+    span : float
+        Width of the prior interval.
+
+    Notes
+    -----
+    MultiNest calls each prior transform once per live point per iteration,
+    so these callbacks sit on a hot path. A ``__slots__`` instance keeps each
+    call to an attribute load and a multiply-add, with no closure frame or
+    instance ``__dict__`` lookup. Being a module-level class, instances also
+    pickle cleanly (closures do not), so retrieval configurations can be
+    serialized or broadcast across ranks.
+    """
+
+    __slots__ = ("lo", "span")
+
+    def __init__(self, lo: float, span: float):
+        self.lo = lo
+        self.span = span
+
+    def __call__(self, x):
+        return self.lo + self.span * x
+
+
+def _pin_rank_affinity(rank: int, size: int, threads_per_rank: int) -> None:
+    """Pin this MPI rank to its own contiguous slice of the allowed cores.
+
+    Parameters
+    ----------
+    rank : int
+        This process's rank in ``MPI.COMM_WORLD``.
+    size : int
+        Total number of MPI ranks.
+    threads_per_rank : int
+        Requested threads per rank (``--omp-threads``); the slice is at least
+        this wide when enough cores are available.
+
+    Notes
+    -----
+    Without pinning, the OS may migrate ranks between cores (and across NUMA
+    domains), evicting each rank's hot opacity-interpolation arrays from the
+    local caches. Giving each rank a disjoint core set keeps its working set
+    resident. Silently skipped on platforms without ``sched_setaffinity``
+    (e.g. macOS).
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    cores = sorted(os.sched_getaffinity(0))
+    per_rank = max(threads_per_rank, len(cores) // size)
+    mine = set(cores[rank * per_rank:(rank + 1) * per_rank])
+    if not mine:
+        # More ranks than cores: leave the kernel's placement alone rather
+        # than pinning several ranks onto the last core.
+        return
+    os.sched_setaffinity(0, mine)
+    print(
+        f"[mpi] rank {rank} pinned to cores {sorted(mine)}",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def _stream_sample_spectra(
+    retrieval_config, data, samples_file: Path, h5_path: Path, batch_size: int = 1
+) -> int:
+    """Recompute posterior sample spectra in bounded batches, streaming to HDF5.
+
+    Parameters
+    ----------
+    retrieval_config : petitRADTRANS.retrieval.RetrievalConfig
+        The retrieval configuration holding the parameter definitions.
+    data : petitRADTRANS.retrieval.data.Data
+        The dataset whose model function and Radtrans object are used for the
+        forward model.
+    samples_file : Path
+        PyMultiNest equal-weight posterior file
+        (``out_PMN/<name>_post_equal_weights.dat``).
+    h5_path : Path
+        Output HDF5 file; receives a ``wavelengths`` dataset and an
+        ``(n_samples, n_wavelengths)`` ``spectra`` dataset.
+    batch_size : int, optional
+        Number of sample spectra to accumulate before each HDF5 write
+        (default: 1). Peak memory is ``O(batch_size * n_wavelengths)``.
+
+    Returns
+    -------
+    int
+        Number of posterior samples processed.
+
+    Notes
+    -----
+    The default evaluate-mode plotting materializes all sample spectra at
+    once; for live-points x spectral-bins arrays this is the largest
+    allocation after the opacity tables. Recomputing spectra in batches of
+    ``batch_size`` and flushing each batch trades one huge allocation for
+    ``ceil(n_samples / batch_size)`` bounded ones, while keeping HDF5 writes
+    chunky enough to avoid per-row write overhead.
+    """
+    import h5py
+    import numpy as np
+
+    parameters = retrieval_config.parameters
+    free_names = [
+        name for name, parameter in parameters.items() if parameter.is_free_parameter
+    ]
+
+    # Equal-weight rows are [free parameters..., log-likelihood].
+    samples = np.atleast_2d(np.loadtxt(samples_file))[:, : len(free_names)]
+    batch_size = max(1, batch_size)
+
+    with h5py.File(h5_path, "w") as h5:
+        spectra = None
+        written = 0
+        for batch in np.array_split(samples, max(1, len(samples) // batch_size)):
+            batch_spectra = []
+            for row in batch:
+                for name, value in zip(free_names, row):
+                    parameters[name].value = value
+                wavelengths, spectrum = data.model_generating_function(
+                    data.radtrans_object, parameters, amr=retrieval_config.amr
+                )
+                batch_spectra.append(spectrum)
+            if spectra is None:
+                h5.create_dataset("wavelengths", data=wavelengths)
+                spectra = h5.create_dataset(
+                    "spectra",
+                    shape=(len(samples), batch_spectra[0].size),
+                    dtype=batch_spectra[0].dtype,
+                )
+            spectra[written:written + len(batch_spectra), :] = batch_spectra
+            written += len(batch_spectra)
+            del batch_spectra
+    return len(samples)
+
+
+def _check_data_file(data_file: Path, rank: int, size: int) -> None:
+    """Verify the spectrum file exists with a single stat, and prefetch it.
+
+    Parameters
+    ----------
+    data_file : Path
+        Path to the observed-spectrum text file.
+    rank : int
+        This process's rank in ``MPI.COMM_WORLD``.
+    size : int
+        Total number of MPI ranks.
+
+    Raises
+    ------
+    FileNotFoundError
+        On every rank, if the file is missing.
+
+    Notes
+    -----
+    A per-rank ``.exists()`` followed by pRT's own open costs two metadata
+    RPCs per rank on a networked filesystem. Rank 0 stats the file once and
+    broadcasts the verdict; it also issues ``posix_fadvise(WILLNEED)`` so the
+    kernel reads the file ahead of pRT's open, letting ranks on the same host
+    hit the page cache.
+    """
+    found = True
+    if rank == 0:
+        try:
+            st = os.stat(data_file)
+        except FileNotFoundError:
+            found = False
+        else:
+            if hasattr(os, "posix_fadvise"):
+                fd = os.open(data_file, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, st.st_size, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+    if size > 1:
+        # size > 1 implies mpi4py imported successfully in _mpi_banner.
+        from mpi4py import MPI  # type: ignore
+
+        found = MPI.COMM_WORLD.bcast(found, root=0)
+    if not found:
+        raise FileNotFoundError(
+            f"Cannot find data file: {data_file}\n"
+            "Expected hst_example_clear_spec.txt in the same directory as this script."
+        )
+
+
+def _broadcast_data_file(data_file: Path, rank: int, size: int) -> Path:
+    """Read the spectrum once on rank 0 and fan it out to the other ranks.
+
+    Parameters
+    ----------
+    data_file : Path
+        Path to the observed-spectrum text file.
+    rank : int
+        This process's rank in ``MPI.COMM_WORLD``.
+    size : int
+        Total number of MPI ranks.
+
+    Returns
+    -------
+    Path
+        Path for this rank to hand to ``add_data``: the original file on
+        rank 0 (and in serial or mpi4py-less runs), or a rank-local copy in
+        the temporary directory otherwise.
+
+    Notes
+    -----
+    Without this, every rank independently opens and parses the same file —
+    N identical reads, which on a shared filesystem is dominated by N cold
+    metadata lookups rather than bandwidth. One read plus an MPI broadcast
+    replaces them; non-zero ranks rehydrate the array to node-local storage
+    since ``add_data`` takes a path.
+    """
+    if size <= 1:
+        return data_file
+    try:
+        from mpi4py import MPI  # type: ignore
+    except ImportError:
+        return data_file
+
+    import numpy as np
+
+    comm = MPI.COMM_WORLD
+    data = np.loadtxt(data_file) if rank == 0 else None
+    data = comm.bcast(data, root=0)
+    if rank == 0:
+        return data_file
+
+    local_file = (
+        Path(tempfile.gettempdir())
+        / f"{data_file.stem}_rank{rank}{data_file.suffix}"
+    )
+    np.savetxt(local_file, data)
+    return local_file
+
+
+class _MemoizedModel:
+    """LRU-memoized wrapper around a pRT model-generating function.
+
+    Parameters
+    ----------
+    model_generating_function : callable
+        The wrapped pRT model function (e.g. ``isothermal_transmission``).
+    free_names : list of str or None, optional
+        Names of the free parameters whose values form the cache key. When
+        ``None`` (the default), they are derived from the parameter dict on
+        the first call, which picks up parameters that pRT registers after
+        this wrapper is constructed (e.g. abundances from
+        ``set_line_species``).
+    maxsize : int, optional
+        Maximum number of cached spectra (default: 2048).
+    temperature_granularity : float, optional
+        Quantization applied to the ``temperature`` parameter when building
+        the cache key, in K (default: 1.0). The correlated-k opacity grids are
+        themselves interpolated on a much coarser temperature grid, so 1 K
+        collisions are well below the model's own accuracy.
+
+    Notes
+    -----
+    The continuum and Rayleigh species lists are fixed across the whole
+    retrieval, but pRT recomputes the full forward model on every call.
+    MultiNest re-proposes duplicate points, resumed runs revisit earlier
+    samples, and evaluate/replot paths recompute identical spectra; this
+    cache short-circuits those repeats. Keys are exact (up to the temperature
+    quantization), so cached results match what the model would return.
+    Calls with ``pt_plot_mode`` set bypass the cache entirely: pRT's plotting
+    paths use it to request the pressure-temperature structure instead of a
+    spectrum, often with the same parameter vector as a spectrum call.
+    """
+
+    def __init__(
+        self,
+        model_generating_function,
+        free_names=None,
+        maxsize: int = 2048,
+        temperature_granularity: float = 1.0,
+    ):
+        from collections import OrderedDict
+
+        self._model = model_generating_function
+        self._free_names = list(free_names) if free_names is not None else None
+        self._maxsize = maxsize
+        self._temperature_granularity = temperature_granularity
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, parameters):
+        if self._free_names is None:
+            self._free_names = [
+                name
+                for name, parameter in parameters.items()
+                if parameter.is_free_parameter
+            ]
+        values = []
+        for name in self._free_names:
+            value = float(parameters[name].value)
+            if name == "temperature":
+                value = round(value / self._temperature_granularity)
+            values.append(value)
+        return tuple(values)
+
+    def __call__(self, prt_object, parameters, pt_plot_mode=None, amr=False):
+        if pt_plot_mode:
+            # P-T plotting returns the temperature structure, not a spectrum;
+            # never mix those results into (or out of) the spectrum cache.
+            return self._model(
+                prt_object, parameters, pt_plot_mode=pt_plot_mode, amr=amr
+            )
+        key = (self._key(parameters), bool(amr))
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        result = self._model(prt_object, parameters, pt_plot_mode=pt_plot_mode, amr=amr)
+        self._cache[key] = result
+        if len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
+        return result
+
+
+def _newest_opacity_mtime(prt_data_dir: Path) -> float:
+    """Return the newest modification time among installed opacity files.
+
+    Parameters
+    ----------
+    prt_data_dir : Path
+        The pRT ``input_data`` directory (as passed via ``--prt-data``).
+
+    Returns
+    -------
+    float
+        Newest ``st_mtime`` over ``opacities/**/*.h5``, or ``0.0`` when no
+        opacity files are found. Used to invalidate the Radtrans cache when
+        opacity files are re-downloaded or rebinned.
+    """
+    mtimes = [f.stat().st_mtime for f in prt_data_dir.glob("opacities/**/*.h5")]
+    return max(mtimes, default=0.0)
+
+
 def _parse_args() -> argparse.Namespace:
     """Parse command-line arguments.
 
@@ -48,6 +475,19 @@ def _parse_args() -> argparse.Namespace:
         default="./retrievals/runs",
         help="Directory to write retrieval outputs (default: ./retrievals/runs).",
     )
+    p.add_argument(
+        "--scratch-dir",
+        type=str,
+        default=None,
+        help=(
+            "Node-local directory (e.g. /tmp/$USER) to run MultiNest "
+            "against; rank 0 copies the results into --output-dir at exit. "
+            "Avoids hammering shared filesystems with MultiNest's frequent "
+            "small checkpoint writes. When resuming a run started without "
+            "this flag, copy the existing outputs into the scratch "
+            "directory first."
+        ),
+    )
     p.add_argument(
         "--name",
         type=str,
@@ -59,11 +499,60 @@ def _parse_args() -> argparse.Namespace:
         action="store_true",
         help="Enable MPI mode (pass use_mpi=True to pRT Retrieval).",
     )
+    p.add_argument(
+        "--sampler",
+        type=str,
+        choices=["pymultinest", "ultranest"],
+        default="pymultinest",
+        help=(
+            "Nested sampler backend (default: pymultinest). 'ultranest' "
+            "switches pRT's Retrieval to the UltraNest reactive sampler — "
+            "useful for cross-checking posteriors and evidence against "
+            "MultiNest. Note pRT hands UltraNest its scalar likelihood, so "
+            "this is not a vectorized/batched mode and carries no per-call "
+            "overhead savings."
+        ),
+    )
     p.add_argument(
         "--n-live-points",
         type=int,
-        default=40,
-        help="Number of live points for MultiNest (default: 40). Increase to see scaling.",
+        default=None,
+        help=(
+            "Number of live points for MultiNest (default: 40). Increase to "
+            "see scaling. Under --use-mpi the default is raised to at least "
+            "4x the number of ranks; pass an explicit value to override."
+        ),
+    )
+    p.add_argument(
+        "--efficiency",
+        type=float,
+        default=None,
+        help=(
+            "MultiNest sampling efficiency (default: auto — 0.8 for "
+            "parameter estimation with <= 10 free parameters, 0.3 for "
+            "evidence-focused runs)."
+        ),
+    )
+    p.add_argument(
+        "--const-efficiency",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=(
+            "Force MultiNest constant-efficiency mode on or off (default: "
+            "auto — on for parameter estimation with <= 10 free parameters). "
+            "Constant-efficiency mode cuts likelihood evaluations but makes "
+            "the evidence estimate less reliable."
+        ),
+    )
+    p.add_argument(
+        "--cache-radtrans",
+        action="store_true",
+        help=(
+            "Cache the pRT Radtrans object to disk after the first run and "
+            "reuse it on --resume/--evaluate-only, skipping the opacity "
+            "re-read (default: off, so first-time smoke tests exercise the "
+            "full cold-start path)."
+        ),
     )
     p.add_argument(
         "--resume",
@@ -75,6 +564,99 @@ def _parse_args() -> argparse.Namespace:
         action="store_true",
         help="Run in evaluate mode (plots only) instead of retrieve mode.",
     )
+    p.add_argument(
+        "--stream-eval",
+        action="store_true",
+        help=(
+            "With --evaluate-only: recompute posterior sample spectra one at "
+            "a time and stream them to an HDF5 file instead of holding the "
+            "full (n_samples, n_wavelengths) array in memory."
+        ),
+    )
+    p.add_argument(
+        "--eval-batch",
+        type=int,
+        default=16,
+        help=(
+            "With --stream-eval: number of sample spectra to accumulate per "
+            "HDF5 write (default: 16). Peak memory scales with this; larger "
+            "batches amortize write overhead."
+        ),
+    )
+    p.add_argument(
+        "--line-species",
+        type=str,
+        nargs="+",
+        default=None,
+        help=(
+            "Line species to load (default: H2O__POKAZATEL CH4__HITEMP "
+            "CO-NatAbund__HITEMP). Opacity memory and per-sample "
+            "interpolation cost scale with this list; drop species that do "
+            "not absorb over your prior temperature range."
+        ),
+    )
+    p.add_argument(
+        "--line-opacity-mode",
+        type=str,
+        choices=["c-k", "lbl"],
+        default="c-k",
+        help=(
+            "Line opacity treatment (default: c-k). Correlated-k is the "
+            "right cost/accuracy point at this resolution; 'lbl' uses "
+            "line-by-line opacities (requires the lbl opacity files, much "
+            "slower and more memory-hungry, but exact)."
+        ),
+    )
+    p.add_argument(
+        "--model-resolution",
+        type=int,
+        default=120,
+        help=(
+            "Spectral resolution of the forward model (default: 120, "
+            "matching the R120 tables produced by setup_opacities.py). "
+            "Per-sample binning work scales with this; other values make "
+            "pRT rebin the opacity tables on first use."
+        ),
+    )
+    p.add_argument(
+        "--prior-file",
+        type=str,
+        default=None,
+        help=(
+            "JSON or YAML file describing the retrieval parameters (fields: "
+            "name, free, lo, hi, scale); see priors_example.yaml. Default: "
+            "the built-in priors of the pRT basic-retrieval example."
+        ),
+    )
+    p.add_argument(
+        "--memoize-model",
+        action="store_true",
+        help=(
+            "Cache forward-model spectra in an LRU keyed on the free "
+            "parameters (temperature quantized to 1 K), short-circuiting "
+            "repeated evaluations from duplicate proposals, resumes, and "
+            "replotting (default: off)."
+        ),
+    )
+    p.add_argument(
+        "--verbose",
+        action="store_true",
+        help=(
+            "Print extra startup diagnostics (the pRT environment dump) on "
+            "rank 0. Off by default to keep MPI startup output minimal."
+        ),
+    )
+    p.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Profile retrieval.run with cProfile on rank 0 and write "
+            "prof.out to the output directory (inspect with snakeviz or "
+            "pstats). Other ranks run unprofiled. Useful to tell Python "
+            "overhead (prior transforms, likelihood wrapper) apart from time "
+            "in pRT's compiled kernels."
+        ),
+    )
     p.add_argument(
         "--omp-threads",
         type=int,
@@ -84,9 +666,15 @@ def _parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
-def _mpi_banner() -> None:
+def _mpi_banner() -> tuple[int, int]:
     """Print MPI rank/size if ``mpi4py`` is available.
 
+    Returns
+    -------
+    tuple of int
+        ``(rank, size)`` of this process in ``MPI.COMM_WORLD``, or ``(0, 1)``
+        when ``mpi4py`` is unavailable.
+
     Notes
     -----
     If ``mpi4py`` is not installed, this function logs a brief message and
@@ -102,7 +690,7 @@ def _mpi_banner() -> None:
             file=sys.stderr,
             flush=True,
         )
-        return
+        return 0, 1
 
     # Report rank/size so users can verify mpirun launched all workers.
     comm = MPI.COMM_WORLD
@@ -110,6 +698,7 @@ def _mpi_banner() -> None:
     size = comm.Get_size()
     host = os.uname().nodename
     print(f"[mpi] rank {rank}/{size} on {host}", file=sys.stderr, flush=True)
+    return rank, size
 
 
 def main() -> int:
@@ -133,34 +722,102 @@ def main() -> int:
     # Parse user options before setting up retrieval state.
     args = _parse_args()
 
+    # Pin thread counts for every common threading backend, not just OpenMP.
+    # NumPy linked against MKL or OpenBLAS (and pRT's Fortran kernels) honor
+    # their own env vars; under `mpirun -np N` each rank could otherwise spawn
+    # its own thread pool, oversubscribing the node N-fold. These must be set
+    # before any import that loads a BLAS library, which is why all heavy
+    # imports below are deferred until after this block.
+    for var in (
+        "OMP_NUM_THREADS",
+        "MKL_NUM_THREADS",
+        "OPENBLAS_NUM_THREADS",
+        "VECLIB_MAXIMUM_THREADS",
+        "NUMEXPR_NUM_THREADS",
+        "BLIS_NUM_THREADS",
+    ):
+        os.environ[var] = str(args.omp_threads)
+
+    # Optional: print MPI info to confirm you launched multiple ranks
+    rank, size = _mpi_banner()
+
+    # Keep each rank on its own core set so its working set stays cache- and
+    # NUMA-local instead of following OS migrations.
+    if args.use_mpi and size > 1:
+        _pin_rank_affinity(rank, size, args.omp_threads)
+
     # Point pRT to the user-supplied opacity/data directory.
     os.environ["PRT_INPUT_DATA_PATH"] = args.prt_data
-    os.environ["pRT_input_data_path"] = args.prt_data  # harmless if unused
-    print(
-        f"[prt] PRT_INPUT_DATA_PATH={os.environ.get('PRT_INPUT_DATA_PATH')}",
-        file=sys.stderr,
-        flush=True,
-    )
-    print(
-        "[prt] ENV dump:",
-        {
-            k: os.environ.get(k)
-            for k in [
-                "PRT_INPUT_DATA_PATH",
-                "pRT_input_data_path",
-                "PRT_DATA",
-                "PETITRADTRANS_INPUT_DATA_PATH",
-            ]
-        },
-        file=sys.stderr,
-        flush=True,
-    )
 
-    # Keep one OpenMP thread per rank unless user explicitly overrides.
-    os.environ["OMP_NUM_THREADS"] = str(args.omp_threads)
+    # pRT < 3 read a lowercase variant of the variable; current versions
+    # ignore it, so only write the duplicate where it is actually needed.
+    # importlib.metadata reads the installed version without importing pRT
+    # (which would prematurely lock in the input data path).
+    try:
+        from importlib.metadata import version
+        prt_version = version("petitRADTRANS")
+    except Exception:
+        prt_version = ""
+    if prt_version < "3":
+        os.environ["pRT_input_data_path"] = args.prt_data
 
-    # Optional: print MPI info to confirm you launched multiple ranks
-    _mpi_banner()
+    # Diagnostics are identical on every rank; print them once on rank 0 so
+    # N-rank launches do not serialize N copies through the stderr forwarder
+    # and the shared log file. The full ENV dump is opt-in via --verbose, and
+    # a single flush at the end replaces per-print flushes (one syscall
+    # instead of one per line).
+    if rank == 0:
+        print(
+            f"[prt] PRT_INPUT_DATA_PATH={os.environ.get('PRT_INPUT_DATA_PATH')}",
+            file=sys.stderr,
+        )
+        if args.verbose:
+            print(
+                "[prt] ENV dump:",
+                {
+                    k: os.environ.get(k)
+                    for k in [
+                        "PRT_INPUT_DATA_PATH",
+                        "pRT_input_data_path",
+                        "PRT_DATA",
+                        "PETITRADTRANS_INPUT_DATA_PATH",
+                    ]
+                },
+                file=sys.stderr,
+            )
+        sys.stderr.flush()
+
+    # Pick the live-point count. MultiNest speedup follows roughly
+    # S = n_live * log(1 + n_cpu / n_live): once the rank count approaches the
+    # number of live points, sampling efficiency collapses and wall time stops
+    # improving. Keeping n_live >= 4 * size stays in the n_live >> n_cpu
+    # regime where scaling is near-linear. An explicit --n-live-points value
+    # is honored as given.
+    n_live_points = args.n_live_points
+    if n_live_points is None:
+        n_live_points = 40
+        if args.use_mpi and size > 1:
+            n_live_points = max(n_live_points, 4 * size)
+    elif args.use_mpi and n_live_points < 4 * size:
+        print(
+            f"[mpi] warning: n_live_points={n_live_points} < 4*size={4 * size}; "
+            "expect poor MPI scaling (see quickstart section 3.2)",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    # Stagger the heavy imports under MPI: rank 0 imports first, paying the
+    # cold filesystem misses for the NumPy/SciPy/pRT module tree once; the
+    # barrier then releases the other ranks, whose imports are served from
+    # the now-warm page cache instead of N concurrent cold reads serialized
+    # on shared-filesystem metadata.
+    barrier = None
+    if size > 1:
+        from mpi4py import MPI  # type: ignore
+
+        barrier = MPI.COMM_WORLD.Barrier
+        if rank != 0:
+            barrier()
 
     # Import retrieval dependencies after environment variables are set.
     # pRT reads PRT_INPUT_DATA_PATH at import time, so the import must come after os.environ is set.
@@ -171,21 +828,39 @@ def main() -> int:
     from petitRADTRANS.retrieval import Retrieval, RetrievalConfig
     from petitRADTRANS.retrieval.models import isothermal_transmission
 
+    if barrier is not None and rank == 0:
+        barrier()
+
     # Resolve opacity data path.
     prt_data_dir = Path(args.prt_data).expanduser().resolve()
 
     # Spectrum file lives alongside this script, not inside the opacity data directory.
     data_file = Path(__file__).parent / "hst_example_clear_spec.txt"
-    if not data_file.exists():
-        raise FileNotFoundError(
-            f"Cannot find data file: {data_file}\n"
-            "Expected hst_example_clear_spec.txt in the same directory as this script."
-        )
+    # One stat on rank 0 (with a read-ahead hint), broadcast to all ranks,
+    # instead of a stat-then-open pair from every rank.
+    _check_data_file(data_file, rank, size)
+
+    # Under MPI, read the spectrum once on rank 0 and broadcast it, so N
+    # ranks do not issue N identical reads against the shared filesystem.
+    # Non-zero ranks get a rank-local copy to pass to add_data below.
+    data_file = _broadcast_data_file(data_file, rank, size)
 
     # Ensure output path exists before initializing pRT retrieval objects.
     output_dir = Path(args.output_dir).expanduser()
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    # MultiNest updates its live-point files with many small seek-writes — a
+    # poor access pattern for NFS/Lustre. With --scratch-dir the sampler runs
+    # against node-local disk and rank 0 bulk-copies the results into the
+    # persistent output directory at exit (including on failure, so partial
+    # chains survive for --resume).
+    work_dir = output_dir
+    if args.scratch_dir:
+        work_dir = Path(args.scratch_dir).expanduser() / args.name
+        work_dir.mkdir(parents=True, exist_ok=True)
+        if rank == 0:
+            atexit.register(shutil.copytree, work_dir, output_dir, dirs_exist_ok=True)
+
     # Toggle between full retrieval and evaluate-only mode from CLI.
     run_mode = "evaluate" if args.evaluate_only else "retrieve"
 
@@ -197,78 +872,203 @@ def main() -> int:
         scattering_in_emission=False,
     )
 
-    # Fixed stellar radius for this example target.
-    retrieval_config.add_parameter(
-        "stellar_radius",
-        False,
-        value=0.651 * cst.r_sun,
-    )
-
-    # Free parameters with explicit prior transforms from unit cube.
-    retrieval_config.add_parameter(
-        "log_g",
-        True,
-        transform_prior_cube_coordinate=lambda x: 2.0 + 3.5 * x,
-    )
-
-    retrieval_config.add_parameter(
-        "planet_radius",
-        True,
-        transform_prior_cube_coordinate=lambda x: (0.2 + 0.2 * x) * cst.r_jup_mean,
-    )
-
-    retrieval_config.add_parameter(
-        "temperature",
-        True,
-        transform_prior_cube_coordinate=lambda x: 300.0 + 2000.0 * x,
-    )
-
-    retrieval_config.add_parameter(
-        "log_Pcloud",
-        True,
-        transform_prior_cube_coordinate=lambda x: -6.0 + 8.0 * x,
+    # Register parameters from the prior specs (built-in defaults, or a user
+    # file via --prior-file). Each free parameter gets a minimal AffinePrior
+    # callable for the MultiNest hot loop; fixed parameters are registered
+    # with their value directly.
+    prior_specs = (
+        _load_prior_specs(Path(args.prior_file))
+        if args.prior_file
+        else _DEFAULT_PRIOR_SPECS
     )
+    for spec in prior_specs:
+        scale = getattr(cst, spec.scale) if spec.scale else 1.0
+        if spec.free:
+            retrieval_config.add_parameter(
+                spec.name,
+                True,
+                transform_prior_cube_coordinate=AffinePrior(
+                    spec.lo * scale, (spec.hi - spec.lo) * scale
+                ),
+            )
+        else:
+            retrieval_config.add_parameter(spec.name, False, value=spec.lo * scale)
 
     # Set opacity sources and line lists used in the transmission model.
     retrieval_config.set_rayleigh_species(["H2", "He"])
     retrieval_config.set_continuum_opacities(["H2--H2", "H2--He"])
 
+    # The line list drives both opacity RAM and per-sample interpolation
+    # cost; --line-species lets benchmark runs load a narrowed set.
+    line_species = args.line_species or [
+        "H2O__POKAZATEL",
+        "CH4__HITEMP",
+        "CO-NatAbund__HITEMP",
+    ]
+    model_resolution = args.model_resolution
+
     retrieval_config.set_line_species(
-        [
-            "H2O__POKAZATEL",
-            "CH4__HITEMP",
-            "CO-NatAbund__HITEMP",
-        ],
+        line_species,
         eq=False,
         abund_lim=(-6.0, 0.0),
     )
 
     # Register the tutorial spectrum and model wrapper with retrieval config.
+    # With --memoize-model, repeated parameter vectors (duplicate proposals,
+    # resumed runs, replotting) reuse the cached spectrum instead of
+    # recomputing the forward model.
+    model_generating_function = isothermal_transmission
+    if args.memoize_model:
+        model_generating_function = _MemoizedModel(isothermal_transmission)
+
     retrieval_config.add_data(
         "HST",
         str(data_file),
-        model_generating_function=isothermal_transmission,
-        line_opacity_mode="c-k",
+        model_generating_function=model_generating_function,
+        line_opacity_mode=args.line_opacity_mode,
         data_resolution=60,
-        model_resolution=120,
+        model_resolution=model_resolution,
     )
 
-    # Instantiate retrieval object and force PyMultiNest backend.
+    # Optionally reuse a pickled Radtrans object instead of re-parsing the
+    # opacity HDF5 files. The cold load is a one-time, bandwidth-bound read of
+    # several hundred MB, which dominates startup for --resume and
+    # --evaluate-only invocations that otherwise do little work. The cache key
+    # covers the line species and model resolution, and the cache is ignored
+    # whenever any opacity file is newer than it. The load must happen before
+    # Retrieval() is constructed: its setup_data() pays the cold opacity read
+    # unless the data object already carries a Radtrans object.
+    radtrans_cache = None
+    radtrans_cache_loaded = False
+    if args.cache_radtrans:
+        key = hashlib.sha1(
+            repr((tuple(line_species), model_resolution)).encode()
+        ).hexdigest()[:12]
+        radtrans_cache = output_dir / f".prt_cache_{key}.pkl"
+        if radtrans_cache.is_file():
+            if radtrans_cache.stat().st_mtime > _newest_opacity_mtime(prt_data_dir):
+                try:
+                    with open(radtrans_cache, "rb") as fh:
+                        retrieval_config.data["HST"].radtrans_object = pickle.load(fh)
+                    radtrans_cache_loaded = True
+                    print(
+                        f"[cache] reusing Radtrans from {radtrans_cache}",
+                        file=sys.stderr,
+                    )
+                except Exception as exc:  # corrupt cache: fall back to cold load
+                    print(
+                        f"[cache] ignoring unreadable cache {radtrans_cache}: {exc}",
+                        file=sys.stderr,
+                    )
+            else:
+                print(
+                    f"[cache] opacity files newer than {radtrans_cache}; rebuilding",
+                    file=sys.stderr,
+                )
+
+    # Instantiate retrieval object with the user-selected sampler backend.
     retrieval = Retrieval(
         retrieval_config,
-        output_directory=str(output_dir),
+        output_directory=str(work_dir),
         use_mpi=bool(args.use_mpi),
         evaluate_sample_spectra=False,
         use_prt_plot_style=True,
-        ultranest=False,
+        ultranest=(args.sampler == "ultranest"),
     )
 
+    # Choose the MultiNest efficiency settings. The MultiNest README defaults
+    # over-explore small parameter spaces: for parameter estimation on a
+    # low-dimensional problem like this one (7 free parameters including the
+    # abundances), constant-efficiency mode at sampling_efficiency=0.8 cuts
+    # the number of ~seconds-long likelihood evaluations substantially.
+    # Evidence-focused runs should prefer ~0.3 without constant efficiency,
+    # which is the auto behavior for larger parameter spaces.
+    n_free = sum(
+        1
+        for parameter in retrieval_config.parameters.values()
+        if parameter.is_free_parameter
+    )
+    sampling_efficiency = args.efficiency
+    if sampling_efficiency is None:
+        sampling_efficiency = 0.8 if (run_mode == "retrieve" and n_free <= 10) else 0.3
+    const_efficiency_mode = args.const_efficiency
+    if const_efficiency_mode is None:
+        const_efficiency_mode = run_mode == "retrieve" and n_free <= 10
+
+    # Streamed evaluation bypasses pRT's plotting path entirely: it reads the
+    # existing chains and writes each recomputed sample spectrum straight to
+    # HDF5, so no full sample-spectra array is ever held in memory. Only
+    # rank 0 does the work: every rank would otherwise recompute all spectra
+    # and open the same HDF5 file for writing.
+    if args.evaluate_only and args.stream_eval:
+        if rank != 0:
+            return 0
+        samples_file = output_dir / "out_PMN" / f"{args.name}_post_equal_weights.dat"
+        if not samples_file.is_file():
+            raise FileNotFoundError(
+                f"Cannot find posterior samples: {samples_file}\n"
+                "Run the retrieval (without --evaluate-only) first."
+            )
+        h5_path = output_dir / f"{args.name}_sample_spectra.h5"
+        n_samples = _stream_sample_spectra(
+            retrieval_config,
+            retrieval_config.data["HST"],
+            samples_file,
+            h5_path,
+            batch_size=args.eval_batch,
+        )
+        print(f"\nStreamed {n_samples} sample spectra to: {h5_path}")
+        return 0
+
+    # Profile only on rank 0: the ranks do near-identical work, and N ranks
+    # dumping stats would contend on the output file.
+    profiler = None
+    if args.profile and rank == 0:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
     # Execute the nested sampling run with user-selected runtime controls.
     retrieval.run(
-        n_live_points=args.n_live_points,
-        const_efficiency_mode=False,
+        n_live_points=n_live_points,
+        sampling_efficiency=sampling_efficiency,
+        const_efficiency_mode=const_efficiency_mode,
         resume=bool(args.resume),
     )
+
+    if args.memoize_model and rank == 0:
+        print(
+            f"[memo] model cache: {model_generating_function.hits} hits / "
+            f"{model_generating_function.misses} misses",
+            file=sys.stderr,
+        )
+
+    if profiler is not None:
+        profiler.disable()
+        prof_out = output_dir / "prof.out"
+        profiler.dump_stats(prof_out)
+        print(
+            f"[profile] wrote {prof_out}; inspect with "
+            f"`snakeviz {prof_out}` or `python -m pstats {prof_out}`",
+            file=sys.stderr,
+        )
+
+    # Populate the cache after a successful run so the next --resume or
+    # --evaluate-only invocation skips the opacity cold load. Runs whenever
+    # the cache was not used this time — missing, unreadable, or stale — so a
+    # rejected cache file gets refreshed instead of lingering forever. Only
+    # rank 0 writes; all ranks would produce identical files.
+    if radtrans_cache is not None and rank == 0 and not radtrans_cache_loaded:
+        radtrans_object = getattr(retrieval_config.data["HST"], "radtrans_object", None)
+        if radtrans_object is not None:
+            try:
+                with open(radtrans_cache, "wb") as fh:
+                    pickle.dump(radtrans_object, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                print(f"[cache] wrote Radtrans cache to {radtrans_cache}", file=sys.stderr)
+            except Exception as exc:  # e.g. unpicklable handles in this pRT version
+                print(f"[cache] could not write cache: {exc}", file=sys.stderr)
+
     print("\nDone.")
     print(f"Outputs written to: {output_dir}")
     return 0